@@ -6,42 +6,81 @@ This script implements an ARIMA model for CPU usage prediction.
 # Import necessary libraries and modules
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
 from math import sqrt
-import statsmodels.api as sm
 import warnings
 import os
 import sys
 
 # Add parent directory to path to import from src
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.prediction_intervals import arima_state, simulate_arima_paths, path_quantiles, quantile_columns
+from src.forecast_cache import ForecastCache, data_watermark
 
 # Suppress warnings for cleaner output
 warnings.filterwarnings('ignore')
 
 print("Loading data for ARIMA model...")
 
-# Load the preprocessed data
-# Try different locations for the data file
+# Locate the preprocessed data
+# Try different locations for the data file. The watermark is taken before
+# reading, so results are never filed under newer data than they came from
 try:
-    scaled_df = pd.read_csv('../df_scaled.csv')
-    print("Loaded data from parent directory")
+    data_path = '../df_scaled.csv'
+    watermark = data_watermark(data_path)
 except FileNotFoundError:
     try:
-        scaled_df = pd.read_csv('../output/df_scaled.csv')
-        print("Loaded data from output directory")
+        data_path = '../output/df_scaled.csv'
+        watermark = data_watermark(data_path)
     except FileNotFoundError:
-        scaled_df = pd.read_csv('output/df_scaled.csv')
-        print("Loaded data from local output directory")
-
-print("Available columns:", scaled_df.columns.tolist())
+        data_path = 'output/df_scaled.csv'
+        watermark = data_watermark(data_path)
 
 # ARIMA (AutoRegressive Integrated Moving Average) modeling
 
+# Model settings
+arima_order = (2, 0, 0)  # Simplified order for faster execution
+max_predictions = 10  # Limit predictions for faster execution
+results_plot = 'output/arima_results.png'
+
+# Prediction interval settings
+quantile_levels = sorted([0.05, 0.5, 0.95])
+interval_horizon = 24
+n_paths = 500
+seed = 0
+
+# Reuse earlier results while the data and settings are unchanged. The plot
+# is not cached, so a missing plot forces a fresh run
+cache = ForecastCache('output/forecast_cache')
+cache_config = {
+    'order': arima_order,
+    'max_predictions': max_predictions,
+    'quantile_levels': quantile_levels,
+    'n_paths': n_paths,
+    'seed': seed,
+}
+cached = cache.get('CPU usage [%]', 'arima', interval_horizon, watermark,
+                   cache_config, outputs=[results_plot])
+
+if cached is None:
+    # Modelling libraries are slow to import, so only load them on a miss
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
+    import statsmodels.api as sm
+
+    scaled_df = pd.read_csv(data_path)
+    print(f"Loaded data from {data_path}")
+    print("Available columns:", scaled_df.columns.tolist())
+
+if cached is not None:
+    print("Data unchanged since last run, using cached ARIMA results")
+    for name, value in cached['metrics'].items():
+        print('Test %s: %.3f' % (name, value))
+    cached['intervals'].to_csv('output/arima_intervals.csv')
+    print(cached['intervals'].head())
+    print("ARIMA prediction intervals saved to output/arima_intervals.csv")
 # Check if required column exists
-if 'CPU usage [%]' in scaled_df.columns:
+elif 'CPU usage [%]' in scaled_df.columns:
     # Splitting the data into training and testing sets
     X = scaled_df['CPU usage [%]']
     size = int(len(X) * 0.66)
@@ -53,9 +92,8 @@ if 'CPU usage [%]' in scaled_df.columns:
 
     # Training and predicting with ARIMA model (limited iterations for demo)
     print("Training ARIMA model...")
-    max_predictions = min(10, len(test))  # Limit predictions for faster execution
-    for t in range(max_predictions):
-        model = sm.tsa.arima.ARIMA(history, order=(2,0,0))  # Simplified order for faster execution
+    for t in range(min(max_predictions, len(test))):
+        model = sm.tsa.arima.ARIMA(history, order=arima_order)
         model_fit = model.fit()
         output = model_fit.forecast()
         yhat = output[0]
@@ -88,12 +126,33 @@ if 'CPU usage [%]' in scaled_df.columns:
         plt.ylabel('CPU usage [%]')
         plt.xlabel('Index')
         plt.grid(True)
-        plt.savefig('output/arima_results.png')
-        print("ARIMA results saved to output/arima_results.png")
+        plt.savefig(results_plot)
+        print(f"ARIMA results saved to {results_plot}")
         plt.show()
+
+        # Prediction intervals: simulate future paths from the latest fit
+        print(f"Simulating {n_paths} paths over {interval_horizon} steps for prediction intervals...")
+        model_fit = sm.tsa.arima.ARIMA(history, order=arima_order).fit()
+        state = arima_state(model_fit)
+        paths = simulate_arima_paths(state['ar'], state['ma'], state['mean'], state['sigma2'],
+                                     state['last_obs'], state['last_resid'],
+                                     horizon=interval_horizon, n_paths=n_paths, seed=seed)
+        quantiles = path_quantiles(paths, quantile_levels)[:, 0, :]
+        interval_df = pd.DataFrame(quantiles.T, columns=quantile_columns(quantile_levels))
+        interval_df.index.name = 'Step'
+        interval_df.to_csv('output/arima_intervals.csv')
+        print(interval_df.head())
+        print("ARIMA prediction intervals saved to output/arima_intervals.csv")
+
+        cache.put('CPU usage [%]', 'arima', interval_horizon, watermark, {
+            'metrics': {'MSE': mse, 'MAE': mae, 'RMSE': rmse, 'R2 score': r2},
+            'intervals': interval_df,
+        }, cache_config)
     else:
         print("No predictions were made.")
 else:
     print("Required column 'CPU usage [%]' not found in the dataset.")
 
+cache.save_stats()
+print("Forecast cache:", cache.stats())
 print("ARIMA model execution completed.")
\ No newline at end of file
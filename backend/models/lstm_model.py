@@ -6,12 +6,6 @@ This script implements an LSTM model for CPU usage prediction.
 # Import necessary libraries and modules
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from keras.models import Sequential
-from keras.layers import LSTM, Dense
-from sklearn.preprocessing import MinMaxScaler
-from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
 import math
 import warnings
 import os
@@ -19,38 +13,97 @@ import sys
 
 # Add parent directory to path to import from src
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.prediction_intervals import calibration_residuals, conformal_quantiles, quantile_columns
+from src.forecast_cache import ForecastCache, data_watermark
 
 # Suppress warnings for cleaner output
 warnings.filterwarnings('ignore')
 
 print("Loading data for LSTM model...")
 
-# Load the preprocessed data
-# Try different locations for the data file
+# Locate the preprocessed data
+# Try different locations for the data file. The watermark is taken before
+# reading, so results are never filed under newer data than they came from
 try:
-    scaled_df = pd.read_csv('../df_scaled.csv')
-    print("Loaded data from parent directory")
+    data_path = '../df_scaled.csv'
+    watermark = data_watermark(data_path)
 except FileNotFoundError:
     try:
-        scaled_df = pd.read_csv('../output/df_scaled.csv')
-        print("Loaded data from output directory")
+        data_path = '../output/df_scaled.csv'
+        watermark = data_watermark(data_path)
     except FileNotFoundError:
-        scaled_df = pd.read_csv('output/df_scaled.csv')
-        print("Loaded data from local output directory")
-
-print("Available columns:", scaled_df.columns.tolist())
+        data_path = 'output/df_scaled.csv'
+        watermark = data_watermark(data_path)
 
 # LSTM (Long Short-Term Memory) modeling
 
+# Model settings
+look_back = 1
+lstm_units = 4
+epochs = 5  # Reduced epochs for demo
+train_split = 0.7
+results_plot = 'output/lstm_results.png'
+
+# Prediction interval settings
+quantile_levels = sorted([0.05, 0.5, 0.95])
+
+# One-step-ahead forecasts
+forecast_horizon = 1
+
+
+def write_intervals(residuals, predictions, actual):
+    """Split-conformal intervals around predictions, checked against actual values"""
+    quantiles = conformal_quantiles(residuals, predictions, quantile_levels)
+    coverage = np.mean((actual >= quantiles[0]) & (actual <= quantiles[-1]))
+    print(f"Interval [{quantile_levels[0]:g}, {quantile_levels[-1]:g}] coverage: {coverage:.2%}")
+
+    interval_df = pd.DataFrame(quantiles.T, columns=quantile_columns(quantile_levels))
+    interval_df.insert(0, 'Actual', actual)
+    interval_df.to_csv('output/lstm_intervals.csv', index=False)
+    print("LSTM prediction intervals saved to output/lstm_intervals.csv")
+
+
+# Reuse earlier results while the data and model settings are unchanged.
+# Quantile levels are not part of the key: intervals are rebuilt from the
+# cached calibration residuals. The plot is not cached, so a missing plot
+# forces a fresh run
+cache = ForecastCache('output/forecast_cache')
+cache_config = {
+    'look_back': look_back,
+    'units': lstm_units,
+    'epochs': epochs,
+    'train_split': train_split,
+}
+cached = cache.get('CPU usage [MHZ]', 'lstm', forecast_horizon, watermark,
+                   cache_config, outputs=[results_plot])
+
+if cached is None:
+    # Keras/TensorFlow take seconds to import, so only load them on a miss
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    from keras.models import Sequential
+    from keras.layers import LSTM, Dense
+    from sklearn.preprocessing import MinMaxScaler
+    from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
+
+    scaled_df = pd.read_csv(data_path)
+    print(f"Loaded data from {data_path}")
+    print("Available columns:", scaled_df.columns.tolist())
+
+if cached is not None:
+    print("Data unchanged since last run, using cached LSTM results")
+    for name, value in cached['metrics'].items():
+        print(f"{name}: {value:.2f}")
+    write_intervals(cached['residuals'], cached['predictions'], cached['actual'])
 # Check if required column exists
-if 'CPU usage [MHZ]' in scaled_df.columns:
+elif 'CPU usage [MHZ]' in scaled_df.columns:
     # Normalize the CPU usage data for LSTM training
     data = scaled_df['CPU usage [MHZ]'].values.reshape(-1, 1)
     scaler = MinMaxScaler(feature_range=(0, 1))
     dataset = scaler.fit_transform(data)
 
     # Split dataset into training and testing sets
-    train_size = int(len(dataset) * 0.7)
+    train_size = int(len(dataset) * train_split)
     train, test = dataset[:train_size], dataset[train_size:]
 
     print(f"Training samples: {len(train)}, Testing samples: {len(test)}")
@@ -64,7 +117,6 @@ if 'CPU usage [MHZ]' in scaled_df.columns:
             Y.append(dataset[i + look_back, 0])
         return np.array(X), np.array(Y)
 
-    look_back = 1
     X_train, Y_train = create_dataset(train, look_back)
     X_test, Y_test = create_dataset(test, look_back)
 
@@ -75,13 +127,13 @@ if 'CPU usage [MHZ]' in scaled_df.columns:
     # Define and compile the LSTM model
     print("Creating LSTM model...")
     model = Sequential()
-    model.add(LSTM(4, input_shape=(1, look_back)))
+    model.add(LSTM(lstm_units, input_shape=(1, look_back)))
     model.add(Dense(1))
     model.compile(loss='mean_squared_error', optimizer='adam')
     
     # Train the model (limited epochs for faster execution)
     print("Training LSTM model...")
-    model.fit(X_train, Y_train, epochs=5, batch_size=1, verbose=2)  # Reduced epochs for demo
+    model.fit(X_train, Y_train, epochs=epochs, batch_size=1, verbose=2)
 
     # Predict using the LSTM model
     print("Making predictions...")
@@ -114,6 +166,25 @@ if 'CPU usage [MHZ]' in scaled_df.columns:
     print(f"Train R2: {train_r2:.2f}")
     print(f"Test R2: {test_r2:.2f}")
 
+    # Split-conformal prediction intervals: the first half of the test set
+    # calibrates the residuals, the second half is used to check coverage
+    calib_size = len(test_predict) // 2
+    residuals = calibration_residuals(test_predict[:calib_size, 0], Y_test[0][:calib_size])
+
+    write_intervals(residuals, test_predict[calib_size:, 0], Y_test[0][calib_size:])
+
+    cache.put('CPU usage [MHZ]', 'lstm', forecast_horizon, watermark, {
+        'metrics': {
+            'Train MAE': train_mae, 'Test MAE': test_mae,
+            'Train MSE': train_mse, 'Test MSE': test_mse,
+            'Train RMSE': train_rmse, 'Test RMSE': test_rmse,
+            'Train R2': train_r2, 'Test R2': test_r2,
+        },
+        'residuals': residuals,
+        'predictions': test_predict[calib_size:, 0],
+        'actual': Y_test[0][calib_size:],
+    }, cache_config)
+
     # Plot actual vs predicted CPU usage
     plt.figure(figsize=(10, 6))
     plt.plot(Y_test[0][:50], 'b', label='Actual')  # Plot first 50 points for clarity
@@ -122,10 +193,12 @@ if 'CPU usage [MHZ]' in scaled_df.columns:
     plt.ylabel('CPU usage [MHZ]')
     plt.xlabel('Steps')
     plt.legend()
-    plt.savefig('output/lstm_results.png')
-    print("LSTM results saved to output/lstm_results.png")
+    plt.savefig(results_plot)
+    print(f"LSTM results saved to {results_plot}")
     plt.show()
 else:
     print("Required column 'CPU usage [MHZ]' not found in the dataset.")
 
+cache.save_stats()
+print("Forecast cache:", cache.stats())
 print("LSTM model execution completed.")
\ No newline at end of file
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+Forecast result cache for the CPU usage models.
+
+Results are keyed by (series id, model, horizon, data watermark) and stored on
+disk together with the settings that produced them, so a later model run can
+reuse them instead of retraining. Every run is a separate process doing a
+single lookup, so there is no in-memory layer: the disk store is what serves
+repeated runs. When new telemetry moves the watermark, or the settings change,
+the stored entry no longer matches and is dropped on the next lookup.
+Hit/miss counts are added to a stats file on disk by save_stats() so they add
+up across runs.
+"""
+
+import os
+import json
+import fcntl
+import pickle
+import hashlib
+import tempfile
+import contextlib
+
+
+def data_watermark(path):
+    """Watermark for a data file: changes whenever the file is rewritten"""
+    st = os.stat(path)
+    return f"{st.st_mtime_ns}-{st.st_size}"
+
+
+def read_cache_stats(cache_dir='output/forecast_cache'):
+    """Cumulative hit/miss counts recorded in a cache directory"""
+    try:
+        with open(os.path.join(cache_dir, 'stats.json')) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {'hits': 0, 'misses': 0}
+
+
+class ForecastCache:
+    """On-disk forecast cache with one pickle file per (series, model, horizon)"""
+
+    def __init__(self, cache_dir='output/forecast_cache'):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self._unsaved = {'hits': 0, 'misses': 0}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, series_id, model, horizon):
+        name = hashlib.sha1(repr((series_id, model, horizon)).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, name + '.pkl')
+
+    def _write_atomic(self, path, data):
+        # A unique temp file per writer so concurrent runs never share one
+        with tempfile.NamedTemporaryFile(dir=self.cache_dir, suffix='.tmp', delete=False) as f:
+            f.write(data)
+        os.replace(f.name, path)
+
+    def _record(self, hit):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        self._unsaved['hits' if hit else 'misses'] += 1
+
+    def get(self, series_id, model, horizon, watermark, config=None, outputs=()):
+        """
+        Return the cached result, or None if missing, stale or produced with
+        other settings. Files listed in outputs (e.g. plots, which are not
+        cached) must exist for the lookup to count as a hit.
+        """
+        path = self._path(series_id, model, horizon)
+        if not os.path.exists(path):
+            self._record(hit=False)
+            return None
+        try:
+            with open(path, 'rb') as f:
+                stored_watermark, stored_config, value = pickle.load(f)
+        except Exception:
+            # Unreadable entries (truncated, older format, other library
+            # versions) are treated like stale ones
+            stored_watermark = stored_config = value = None
+
+        if stored_watermark != watermark or stored_config != config:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+            self._record(hit=False)
+            return None
+
+        if not all(os.path.exists(output) for output in outputs):
+            self._record(hit=False)
+            return None
+
+        self._record(hit=True)
+        return value
+
+    def put(self, series_id, model, horizon, watermark, value, config=None):
+        """Store a result on disk, replacing any older entry"""
+        self._write_atomic(self._path(series_id, model, horizon),
+                           pickle.dumps((watermark, config, value)))
+
+    def save_stats(self):
+        """Add this instance's unsaved hit/miss counts to the totals on disk"""
+        # Concurrent runs serialise the read-modify-write on a lock file
+        with open(os.path.join(self.cache_dir, 'stats.lock'), 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            totals = read_cache_stats(self.cache_dir)
+            for name, count in self._unsaved.items():
+                totals[name] = totals.get(name, 0) + count
+                self._unsaved[name] = 0
+            self._write_atomic(os.path.join(self.cache_dir, 'stats.json'), json.dumps(totals).encode('utf-8'))
+
+    def stats(self):
+        """Hit/miss counts for this instance, plus the totals saved on disk"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'saved_total': read_cache_stats(self.cache_dir),
+        }
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+Prediction intervals for the CPU usage models.
+
+ARIMA intervals come from simulating many future paths per series at once;
+LSTM intervals come from split-conformal calibration on held-out residuals.
+Both return quantile arrays shaped (n_levels, ...) so a p95 can be read off
+directly for provisioning.
+"""
+
+import numpy as np
+
+# Default quantile levels reported by the models
+DEFAULT_LEVELS = (0.05, 0.5, 0.95)
+
+
+def arima_state(model_fit):
+    """
+    Extract the parameters and recent state needed to simulate a fitted ARIMA(p,0,q).
+
+    Differenced or seasonal fits are rejected: simulate_arima_paths works on
+    levels, so their intervals would be silently wrong.
+    """
+    model = model_fit.model
+    seasonal = (getattr(model, 'seasonal_order', None) or (0, 0, 0, 0))[:3]
+    if getattr(model, 'k_diff', 0) or getattr(model, 'k_seasonal_diff', 0) or any(seasonal):
+        raise ValueError("Only non-seasonal ARIMA(p,0,q) fits can be simulated")
+    params = dict(zip(model_fit.param_names, np.asarray(model_fit.params)))
+    endog = np.asarray(model_fit.model.endog).ravel()
+    resid = np.asarray(model_fit.resid).ravel()
+    p = len(model_fit.arparams)
+    q = len(model_fit.maparams)
+    return {
+        'ar': np.asarray(model_fit.arparams),
+        'ma': np.asarray(model_fit.maparams),
+        'mean': params.get('const', 0.0),
+        'sigma2': params['sigma2'],
+        'last_obs': endog[len(endog) - p:],
+        'last_resid': resid[len(resid) - q:],
+    }
+
+
+def stack_arima_states(states):
+    """Stack per-series ARIMA states (same order) into batched arrays"""
+    return {key: np.stack([np.asarray(s[key], dtype=float) for s in states])
+            for key in ('ar', 'ma', 'mean', 'sigma2', 'last_obs', 'last_resid')}
+
+
+def simulate_arima_paths(ar, ma, mean, sigma2, last_obs, last_resid,
+                         horizon, n_paths=500, seed=None, chunk_size=1000):
+    """
+    Simulate future paths of ARMA(p,q) processes for many series at once.
+
+    ar: (n_series, p), ma: (n_series, q), mean and sigma2: (n_series,),
+    last_obs: (n_series, p) and last_resid: (n_series, q), oldest first.
+    Returns an array of shape (n_series, n_paths, horizon).
+
+    All series and paths in a chunk are advanced together, so the only Python
+    loops are over chunks, the horizon and the (few) lags. chunk_size bounds
+    the working memory beyond the returned array; the draws depend on it, so
+    keep it fixed when comparing seeded runs.
+    """
+    ar = np.atleast_2d(np.asarray(ar, dtype=float))
+    ma = np.atleast_2d(np.asarray(ma, dtype=float))
+    mean = np.atleast_1d(np.asarray(mean, dtype=float))
+    sigma = np.sqrt(np.atleast_1d(np.asarray(sigma2, dtype=float)))
+    n_series, p = ar.shape
+    q = ma.shape[1]
+    last_obs = np.asarray(last_obs, dtype=float).reshape(n_series, p)
+    last_resid = np.asarray(last_resid, dtype=float).reshape(n_series, q)
+
+    rng = np.random.default_rng(seed)
+    paths = np.empty((n_series, n_paths, horizon))
+    for start in range(0, n_series, chunk_size):
+        chunk = slice(start, min(start + chunk_size, n_series))
+        size = chunk.stop - chunk.start
+
+        # Time-major buffers: the lagged deviations from the mean (and the
+        # lagged shocks) followed by the simulated horizon. The shocks are
+        # drawn straight into their buffer, which keeps every time step a
+        # contiguous (size, n_paths) block
+        eps = np.empty((q + horizon, size, n_paths))
+        eps[:q] = last_resid[chunk].T[:, :, None]
+        rng.standard_normal(out=eps[q:])
+        eps[q:] *= sigma[chunk, None]
+        dev = np.empty((p + horizon, size, n_paths))
+        dev[:p] = (last_obs[chunk] - mean[chunk, None]).T[:, :, None]
+
+        for h in range(horizon):
+            value = dev[p + h]
+            value[...] = eps[q + h]
+            for i in range(p):
+                value += ar[chunk, i, None] * dev[p + h - 1 - i]
+            for j in range(q):
+                value += ma[chunk, j, None] * eps[q + h - 1 - j]
+
+        paths[chunk] = dev[p:].transpose(1, 2, 0) + mean[chunk, None, None]
+    return paths
+
+
+def quantile_columns(levels):
+    """Column names for quantile levels, e.g. 0.975 -> 'q0.975'"""
+    return [f'q{q:g}' for q in levels]
+
+
+def path_quantiles(paths, levels=DEFAULT_LEVELS):
+    """Quantiles across simulated paths: (n_series, n_paths, horizon) -> (n_levels, n_series, horizon)"""
+    return np.quantile(paths, levels, axis=1)
+
+
+def calibration_residuals(calib_pred, calib_true):
+    """Sorted signed residuals (true - predicted) on a held-out calibration set"""
+    return np.sort(np.asarray(calib_true, dtype=float) - np.asarray(calib_pred, dtype=float), axis=0)
+
+
+def conformal_quantiles(resid, pred, levels=DEFAULT_LEVELS):
+    """
+    Split-conformal quantiles around point predictions.
+
+    resid are the sorted calibration residuals from calibration_residuals().
+    Each level is mapped to the conservative finite-sample rank
+    ceil((n + 1) * level) above the median and floor((n + 1) * level) below
+    it. When the calibration set is too small for a level (rank 0 or n + 1)
+    the bound is -inf or +inf rather than the most extreme residual, which
+    would under-cover. Residuals may carry trailing series axes, e.g. (n_calib, n_series)
+    with pred shaped (n_points, n_series).
+    Returns an array of shape (n_levels,) + pred.shape.
+    """
+    resid = np.asarray(resid, dtype=float)
+    n = resid.shape[0]
+    if n == 0:
+        raise ValueError("At least one calibration residual is required")
+    levels = np.asarray(levels, dtype=float)
+    ranks = np.where(levels >= 0.5,
+                     np.ceil((n + 1) * levels),
+                     np.floor((n + 1) * levels))
+    ranks = ranks.astype(int)
+    offsets = resid[np.clip(ranks, 1, n) - 1]
+    out_of_range = (ranks < 1) | (ranks > n)
+    if out_of_range.any():
+        bounds = np.where(ranks < 1, -np.inf, np.inf)
+        offsets = np.where(out_of_range.reshape((-1,) + (1,) * (resid.ndim - 1)),
+                           bounds.reshape((-1,) + (1,) * (resid.ndim - 1)), offsets)
+
+    # Broadcast the per-level offsets over the leading (time) axes of pred
+    pred = np.asarray(pred, dtype=float)
+    lead = pred.ndim - (resid.ndim - 1)
+    offsets = offsets.reshape((len(levels),) + (1,) * lead + resid.shape[1:])
+    return pred[None, ...] + offsets
@@ -0,0 +1,67 @@
+"""
+Tests for the on-disk forecast cache
+"""
+
+import os
+import sys
+from multiprocessing import Pool
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.forecast_cache import ForecastCache, data_watermark, read_cache_stats
+
+
+def test_hit_after_put_and_invalidation_on_new_data(tmp_path):
+    data = tmp_path / 'data.csv'
+    data.write_text('a\n1\n')
+    cache = ForecastCache(str(tmp_path / 'cache'))
+    watermark = data_watermark(data)
+
+    assert cache.get('fleet', 'arima', 24, watermark) is None
+    cache.put('fleet', 'arima', 24, watermark, {'p95': 1.0})
+    assert ForecastCache(str(tmp_path / 'cache')).get('fleet', 'arima', 24, watermark) == {'p95': 1.0}
+
+    data.write_text('a\n1\n2\n')
+    assert cache.get('fleet', 'arima', 24, data_watermark(data)) is None
+    assert cache.get('fleet', 'arima', 24, watermark) is None
+    assert (cache.hits, cache.misses) == (0, 3)
+
+
+def test_settings_mismatch_is_a_miss(tmp_path):
+    cache = ForecastCache(str(tmp_path))
+    cache.put('fleet', 'arima', 24, 'w', 'old', config={'quantile_levels': [0.05, 0.95]})
+    assert cache.get('fleet', 'arima', 24, 'w', config={'quantile_levels': [0.1, 0.9]}) is None
+    assert cache.misses == 1
+
+
+def test_missing_outputs_count_as_miss(tmp_path):
+    cache = ForecastCache(str(tmp_path / 'cache'))
+    plot = tmp_path / 'results.png'
+    cache.put('fleet', 'lstm', 1, 'w', 'value')
+    assert cache.get('fleet', 'lstm', 1, 'w', outputs=[str(plot)]) is None
+    plot.write_bytes(b'png')
+    assert cache.get('fleet', 'lstm', 1, 'w', outputs=[str(plot)]) == 'value'
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_unreadable_entry_is_dropped(tmp_path):
+    cache = ForecastCache(str(tmp_path))
+    cache.put('fleet', 'arima', 24, 'w', 'value')
+    path = cache._path('fleet', 'arima', 24)
+    with open(path, 'wb') as f:
+        f.write(b'\x80\x04not a pickle')
+    assert cache.get('fleet', 'arima', 24, 'w') is None
+    assert not os.path.exists(path)
+
+
+def record_and_save(cache_dir):
+    cache = ForecastCache(cache_dir)
+    for _ in range(5):
+        cache.get('fleet', 'arima', 24, 'w')
+    cache.save_stats()
+
+
+def test_concurrent_save_stats_keeps_every_count(tmp_path):
+    cache_dir = str(tmp_path)
+    with Pool(8) as pool:
+        pool.map(record_and_save, [cache_dir] * 40)
+    assert read_cache_stats(cache_dir) == {'hits': 0, 'misses': 200}
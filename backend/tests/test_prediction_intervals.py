@@ -0,0 +1,100 @@
+"""
+Tests for the vectorized ARIMA simulation and split-conformal intervals
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+import statsmodels.api as sm
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.prediction_intervals import (arima_state, stack_arima_states, simulate_arima_paths,
+                                      path_quantiles, calibration_residuals, conformal_quantiles)
+
+
+def arma_series(n=400, seed=1):
+    rng = np.random.default_rng(seed)
+    eps = rng.standard_normal(n + 1)
+    y = np.zeros(n)
+    for t in range(2, n):
+        y[t] = 0.5 * y[t - 1] + 0.2 * y[t - 2] + eps[t] + 0.3 * eps[t - 1]
+    return y + 10
+
+
+@pytest.mark.parametrize('order', [(2, 0, 1), (2, 0, 0), (0, 0, 1)])
+def test_simulated_paths_match_statsmodels_forecast(order):
+    model_fit = sm.tsa.arima.ARIMA(arma_series(), order=order).fit()
+    state = arima_state(model_fit)
+    horizon, n_paths = 8, 20000
+    paths = simulate_arima_paths(state['ar'], state['ma'], state['mean'], state['sigma2'],
+                                 state['last_obs'], state['last_resid'],
+                                 horizon=horizon, n_paths=n_paths, seed=0)[0]
+
+    forecast = model_fit.get_forecast(horizon)
+    expected_mean = np.asarray(forecast.predicted_mean)
+    expected_sd = np.sqrt(np.asarray(forecast.var_pred_mean))
+    assert np.all(np.abs(paths.mean(axis=0) - expected_mean) < 4 * expected_sd / np.sqrt(n_paths))
+    np.testing.assert_allclose(paths.std(axis=0), expected_sd, rtol=0.03)
+
+
+@pytest.mark.parametrize('kwargs', [{'order': (1, 1, 0)}, {'order': (1, 0, 0), 'seasonal_order': (1, 0, 0, 4)}])
+def test_arima_state_rejects_differenced_and_seasonal_fits(kwargs):
+    model_fit = sm.tsa.arima.ARIMA(arma_series(), **kwargs).fit()
+    with pytest.raises(ValueError):
+        arima_state(model_fit)
+
+
+def test_batched_simulation_shapes_and_chunking():
+    states = [
+        {'ar': [0.5, 0.2], 'ma': [0.3], 'mean': 10.0, 'sigma2': 1.0, 'last_obs': [12.0, 11.0], 'last_resid': [0.5]},
+        {'ar': [0.1, 0.0], 'ma': [0.0], 'mean': 50.0, 'sigma2': 4.0, 'last_obs': [49.0, 51.0], 'last_resid': [0.0]},
+        {'ar': [0.9, -0.1], 'ma': [-0.2], 'mean': 0.0, 'sigma2': 0.25, 'last_obs': [1.0, 2.0], 'last_resid': [-1.0]},
+    ]
+    batch = stack_arima_states(states)
+    assert batch['ar'].shape == (3, 2)
+    assert batch['mean'].shape == (3,)
+
+    paths = simulate_arima_paths(**batch, horizon=5, n_paths=4000, seed=0, chunk_size=2)
+    assert paths.shape == (3, 4000, 5)
+    assert path_quantiles(paths, [0.05, 0.5, 0.95]).shape == (3, 3, 5)
+
+    # Each series in the batch behaves like the same series simulated alone
+    single = simulate_arima_paths(**{k: v[1:2] for k, v in batch.items()}, horizon=5, n_paths=4000, seed=1)
+    np.testing.assert_allclose(paths[1].mean(axis=0), single[0].mean(axis=0), atol=0.15)
+    np.testing.assert_allclose(paths[1].std(axis=0), single[0].std(axis=0), rtol=0.05)
+
+
+def test_conformal_ranks_on_known_residuals():
+    resid = calibration_residuals(np.zeros(19), np.arange(1.0, 20.0))
+    quantiles = conformal_quantiles(resid, np.array([0.0, 100.0]), [0.1, 0.5, 0.9])
+    # n = 19: ranks floor(2.0) = 2, ceil(10.0) = 10, ceil(18.0) = 18
+    np.testing.assert_array_equal(quantiles[:, 0], [2.0, 10.0, 18.0])
+    np.testing.assert_array_equal(quantiles[:, 1], [102.0, 110.0, 118.0])
+
+
+def test_conformal_levels_beyond_calibration_size_are_unbounded():
+    resid = calibration_residuals(np.zeros(9), np.arange(9.0))
+    quantiles = conformal_quantiles(resid, np.zeros(3), [0.05, 0.5, 0.95])
+    assert np.all(quantiles[0] == -np.inf)
+    assert np.all(quantiles[2] == np.inf)
+    assert np.all(np.isfinite(quantiles[1]))
+
+
+def test_conformal_quantiles_with_series_axis():
+    rng = np.random.default_rng(0)
+    scales = np.array([1.0, 5.0, 20.0])
+    resid = calibration_residuals(np.zeros((2000, 3)), rng.standard_normal((2000, 3)) * scales)
+    quantiles = conformal_quantiles(resid, np.zeros((7, 3)), [0.05, 0.95])
+    assert quantiles.shape == (2, 7, 3)
+    np.testing.assert_allclose(quantiles[1, 0], 1.645 * scales, rtol=0.1)
+
+
+def test_conformal_coverage():
+    rng = np.random.default_rng(0)
+    resid = calibration_residuals(np.zeros(1000), rng.standard_normal(1000))
+    actual = rng.standard_normal(20000)
+    quantiles = conformal_quantiles(resid, np.zeros_like(actual), [0.05, 0.95])
+    coverage = np.mean((actual >= quantiles[0]) & (actual <= quantiles[1]))
+    assert 0.88 <= coverage <= 0.92
@@ -147,7 +147,17 @@ app.get('/api/models/predictions', async (c) => {
         type: f.includes('arima') ? 'ARIMA' : f.includes('lstm') ? 'LSTM' : 'DeepAR'
       }));
     
-    return c.json({ predictions });
+    // Hit/miss totals saved by the Python forecast cache
+    const statsFile = Bun.file('./output/forecast_cache/stats.json');
+    let cache = null;
+    try {
+      cache = await statsFile.exists() ? await statsFile.json() : null;
+    } catch {
+      // An unreadable stats file should not hide the prediction images
+      cache = null;
+    }
+    
+    return c.json({ predictions, cache });
   } catch (error) {
     return c.json({ error: 'Failed to load predictions' }, 500);
   }